@@ -1,10 +1,16 @@
  
-import re
-import json
 import os
-from typing import List, Optional, Dict
+import re
+import sys
+import asyncio
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import product
+from typing import Callable, List, Optional, Dict
+import orjson
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, PrivateAttr
 from fastapi.middleware.cors import CORSMiddleware
 
 try:
@@ -14,7 +20,7 @@ try:
 except ImportError:
     ARABIC_SUPPORT = False
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Enable CORS for frontend communication
 app.add_middleware(
@@ -26,18 +32,23 @@ app.add_middleware(
 
 # --- Linguistic Logic ---
 
+# One-pass normalization table:
+# - remove short vowels / shadda / sukun (U+064E..U+0652) but KEEP tanween (ً ٌ ٍ)
+# - keep hamza (أ إ آ) - only normalize shapes (إ آ → أ), do NOT convert to ا
+# - Taa Marbuta → Haa, Alef Maqsura → Yaa
+_NORMALIZE_TABLE = str.maketrans({
+    **{chr(c): None for c in range(0x064E, 0x0653)},
+    'إ': 'أ',
+    'آ': 'أ',
+    'ة': 'ه',
+    'ى': 'ي',
+})
+
+@lru_cache(maxsize=4096)
 def normalize_arabic(text: str) -> str:
     """Standardize Arabic text for robust comparison."""
     if not text: return ""
-    # Remove short vowels / shadda / sukun but KEEP tanween (ً ٌ ٍ)
-    text = re.sub(r'[\u064E-\u0652]', '', text)
-    # Keep hamza (أ إ آ) - only normalize shapes, do NOT convert to ا
-    text = text.replace('إ', 'أ').replace('آ', 'أ')
-    # Standardize Taa Marbuta to Haa
-    text = text.replace('ة', 'ه')
-    # Standardize Yaa / Alef Maqsura
-    text = text.replace('ى', 'ي')
-    return text.strip()
+    return text.translate(_NORMALIZE_TABLE).strip()
 
 def display_arabic(text: str) -> str:
     """Format Arabic text for bidirectional display (for console logs)."""
@@ -66,22 +77,30 @@ def expand_ajwaf_root_for_pattern(root: str, verb_type: str) -> str:
     return r1 + "و" + r3  # default أجوف
 
 
+@lru_cache(maxsize=4096)
+def _root_translation(root: str) -> dict:
+    """Translation table ف/ع/ل → r1/r2/r3, built once per (expanded) root."""
+    return str.maketrans({'ف': root[0], 'ع': root[1], 'ل': root[2]})
+
+
+@lru_cache(maxsize=8192)
 def apply_pattern(root: str, pattern: str, verb_type: Optional[str] = None) -> str:
     """Inject a 3-letter root into a pattern. For أجوف, uses expanded root (قول not قال)."""
     if len(root) != 3:
         return ""
     root = expand_ajwaf_root_for_pattern(root, verb_type or "")
-    r1, r2, r3 = root[0], root[1], root[2]
-    res = []
-    for char in pattern:
-        if char == 'ف': res.append(r1)
-        elif char == 'ع': res.append(r2)
-        elif char == 'ل': res.append(r3)
-        else: res.append(char)
-    return "".join(res)
+    # Single C-level pass: ف/ع/ل → r1/r2/r3, everything else kept
+    return pattern.translate(_root_translation(root))
 
-def detect_verb_type(root: str) -> str:
-    """Detect the verb type (category) based on root composition."""
+# Letter classes used by the verb-type classifier
+_WEAK_LETTERS = frozenset('اوي')
+_HAMZA_FORMS = frozenset('ءأإآ')
+
+def _classify_root(root: str) -> str:
+    """Reference classifier: the full decision cascade over a 3-letter root.
+
+    Only used to build _VERB_TYPE_TABLE; call detect_verb_type instead.
+    """
     if len(root) != 3:
         return "غير معروف"
     
@@ -90,21 +109,18 @@ def detect_verb_type(root: str) -> str:
     # Normalize: ى → ي, ا → ا (alef maqsura becomes ya)
     r3_normalized = 'ي' if r3 in ('ى', 'ي') else r3
     
-    weak_letters = {'ا', 'و', 'ي'}
-    hamza = 'ء'
-    
     # Check hamza (at any position)
-    has_hamza_start = r1 == hamza or r1 in ('أ', 'إ', 'آ')
-    has_hamza_mid = r2 == hamza or r2 in ('أ', 'إ', 'آ')
-    has_hamza_end = r3 == hamza or r3 in ('أ', 'إ', 'آ')
+    has_hamza_start = r1 in _HAMZA_FORMS
+    has_hamza_mid = r2 in _HAMZA_FORMS
+    has_hamza_end = r3 in _HAMZA_FORMS
     
     # Check weak letters (original positions)
-    weak_start = r1 in weak_letters
-    weak_mid = r2 in weak_letters
-    weak_end = r3 in weak_letters or r3 == 'ى'  # Include alef maqsura
+    weak_start = r1 in _WEAK_LETTERS
+    weak_mid = r2 in _WEAK_LETTERS
+    weak_end = r3 in _WEAK_LETTERS or r3 == 'ى'  # Include alef maqsura
     
     # Check for doubled letters (مضاعف)
-    if r2 == r3 and r2 not in weak_letters:
+    if r2 == r3 and r2 not in _WEAK_LETTERS:
         return "مضاعف"
     
     # --- Hamza Verbs (مهموز) ---
@@ -183,6 +199,37 @@ def detect_verb_type(root: str) -> str:
     
     return "غير معروف"
 
+# The cascade only looks at which class each letter falls in (plus whether
+# r2 == r3), so its answer for every combination can be tabulated up front.
+# Letters not listed behave like any other consonant (class 0).
+_LETTER_CLASS = {'و': 1, 'ي': 2, 'ى': 3, 'ا': 4, 'ء': 5, 'أ': 5, 'إ': 5, 'آ': 5}
+# Representative letters per class; two where distinct members can pair as r2/r3
+_CLASS_SAMPLES = {0: 'بت', 1: 'و', 2: 'ي', 3: 'ى', 4: 'ا', 5: 'أء'}
+
+
+def _build_verb_type_table() -> Dict[tuple, str]:
+    table = {}
+    for c1, c2, c3 in product(_CLASS_SAMPLES, repeat=3):
+        r1, r2 = _CLASS_SAMPLES[c1][0], _CLASS_SAMPLES[c2][0]
+        for r3 in _CLASS_SAMPLES[c3]:
+            # Interned: the dispatch tables below share these objects as keys
+            table[c1, c2, c3, r2 == r3] = sys.intern(_classify_root(r1 + r2 + r3))
+    return table
+
+
+# (class r1, class r2, class r3, r2 == r3) -> verb type
+_VERB_TYPE_TABLE = _build_verb_type_table()
+
+
+def detect_verb_type(root: str) -> str:
+    """Detect the verb type (category) based on root composition."""
+    if len(root) != 3:
+        return "غير معروف"
+    r2, r3 = root[1], root[2]
+    cls = _LETTER_CLASS.get
+    return _VERB_TYPE_TABLE[cls(root[0], 0), cls(r2, 0), cls(r3, 0), r2 == r3]
+
+@lru_cache(maxsize=1024)
 def identify_pattern_type(pattern: str, scheme_id: str = "") -> str:
     """Identify which morphological form a pattern represents by scheme_id.
     Scheme ID is more reliable than pattern string matching.
@@ -226,366 +273,287 @@ def identify_pattern_type(pattern: str, scheme_id: str = "") -> str:
     
     return 'unknown'
 
-def apply_verb_transformations(word: str, root: str, verb_type: str, pattern: str, scheme_id: str = "") -> str:
-    """Apply morphological transformations based on verb type and pattern."""
-    
+# --- Verb-type transformations ---
+# One small handler per (verb type, pattern type) that changes the word; every
+# other combination keeps the normalized word. Handlers receive the normalized
+# word and the original root (which keeps its hamza).
+
+def _restore_hamza(text: str, pos: int, char: str) -> str:
+    """Put the root's hamza back at `pos` (normalization may have changed it)."""
+    if pos < len(text):
+        # Accept any form of hamza: أ، إ، آ، ء
+        if char in _HAMZA_FORMS:
+            return text[:pos] + char + text[pos+1:]
+    return text
+
+def _fix_naqis_patient(w: str, r: str) -> str:
+    """Fix ناقص مفعول - safely remove inserted و before last root letter."""
+    # Only remove an internal و; never touch a final و
+    if len(w) < 3:
+        return w
+    i = w.find('و', 0, len(w) - 1)
+    return w[:i] + w[i+1:] if i != -1 else w
+
+def _drop_final_weak(word: str) -> str:
+    """Drop a final weak letter (ا/و/ي), as in the ناقص imperative (ادعو → ادع)."""
+    return word[:-1] if word[-1:] in _WEAK_LETTERS else word
+
+def _drop_final_weak_handler(w: str, root: str) -> str:
+    return _drop_final_weak(w)
+
+# === مضاعف ===
+def _mudaaf_imperative(w: str, root: str) -> str:
+    return w[1:] if w.startswith('ا') else w
+
+# === مهموز الفاء (Hamza at START) ===
+def _mahmuz_fa_past(w: str, root: str) -> str:
+    return _restore_hamza(w, 0, root[0])
+
+def _mahmuz_fa_present(w: str, root: str) -> str:
+    if w and w[0] == 'ي':
+        return w[0] + _restore_hamza(w[1:], 0, root[0])
+    return w
+
+def _mahmuz_fa_imperative(w: str, root: str) -> str:
+    return w[-2:] if len(w) >= 2 else w
+
+def _mahmuz_fa_agent(w: str, root: str) -> str:
+    # Handle important cases: أاكل / ااكل → آكل (only for مهموز الفاء + فاعل)
+    if len(w) >= 2:
+        if (w.startswith('أا') or w.startswith('اا')) and root[0] == 'أ':
+            return 'آ' + w[2:]
+    return w
+
+def _mahmuz_fa_patient(w: str, root: str) -> str:
+    # مفعول → مأكول: hamza as first root letter (after م)
+    if len(w) >= 2:
+        return w[0] + root[0] + w[2:]
+    return w
+
+# === مهموز العين (Hamza at MIDDLE) ===
+def _mahmuz_ayn_past(w: str, root: str) -> str:
+    # فَأَعَلَ - restore hamza at position 1
+    return _restore_hamza(w, 1, root[1])
+
+def _mahmuz_ayn_present(w: str, root: str) -> str:
+    # يَفْأَعَلُ - restore hamza at position 2 (after ي + first consonant)
+    if w.startswith('ي'):
+        return w[0:2] + _restore_hamza(w[2:], 0, root[1])
+    return w
+
+def _mahmuz_ayn_imperative(w: str, root: str) -> str:
+    # اِفْأَعَلْ - restore hamza at position 1 (after ا + first consonant)
+    if w.startswith('ا'):
+        return w[0:2] + _restore_hamza(w[2:], 0, root[1])
+    return w
+
+def _mahmuz_ayn_agent(w: str, root: str) -> str:
+    # Fix مهموز العين in فاعل: ساأل / ساال → سائل
+    # Rule: ا + (ء or normalized ا from hamza) → ائ
+    if len(w) >= 3:
+        # Case 1: normalized form (ساال)
+        if w[1] == 'ا' and w[2] == 'ا':
+            return w[0] + 'ائ' + w[3:]
+        # Case 2: original root has hamza as عين (سأل، قرأ، ملأ)
+        if w[1] == 'ا' and root[1] in _HAMZA_FORMS:
+            return w[0] + 'ائ' + w[3:]
+    return w
+
+def _mahmuz_ayn_patient(w: str, root: str) -> str:
+    # مَفْؤُول - hamza in position 2
+    return w[:2] + _restore_hamza(w[2:], 0, root[1]) if len(w) >= 3 else w
+
+# === مهموز اللام (Hamza at END) ===
+def _mahmuz_lam(w: str, root: str) -> str:
+    # Restore hamza at last position
+    return _restore_hamza(w, len(w) - 1, root[2])
+
+# === مثال واوي (Weak at START: و) ===
+# Patterns: وَفَعَلَ | يَفْعِلُ | فِعْلْ | فَاعِل | مَفْعُول
+def _mithal_wawi_present(w: str, root: str) -> str:
+    # يَفْعِلُ (drop weak و, keep valid present prefix)
+    # Example: يوجد → يجد
+    if len(w) >= 3:
+        prefix = w[0]
+        if prefix in ['ي', 'ت', 'ن', 'أ'] and w[1] == 'و':
+            return prefix + w[2:]
+    return w
+
+def _mithal_wawi_imperative(w: str, root: str) -> str:
+    # فِعْلْ (drop ا prefix AND weak و)
+    # Pattern gives افْعَل, word is اوعد
+    # Result: عد (remove ا and و)
+    if len(w) >= 3 and w.startswith('ا') and w[1] == 'و':
+        return w[2:]
+    return w
+
+# === أجوف واوي / أجوف يائي (Weak in MIDDLE) ===
+# Patterns: فَالَ | يَفُولُ | فُلْ | فَائِل | مَفُول  (يائي: فَالَ | يَفِيلُ | فِلْ | فَائِل | مَفِيل)
+def _ajwaf_imperative(w: str, root: str) -> str:
+    # فُلْ / فِلْ (just ف + ل, no ا prefix)
+    # Pattern gives اقال, should be قل (first and last letter only)
+    if len(w) >= 2:
+        return w[0] + w[-1]
+    return w
+
+def _ajwaf_wawi_agent(w: str, root: str) -> str:
+    # فَائِل (ا + ي + ل, with hamza); replace() returns w itself when there is no match
+    return w.replace('ال', 'ائ').replace('او', 'ائ')
+
+def _ajwaf_yai_agent(w: str, root: str) -> str:
+    # فَائِل (ا + ي + ل, with hamza); replace() returns w itself when there is no match
+    return w.replace('ال', 'ائ').replace('اي', 'ائ')
+
+# === ناقص (Weak at END) ===
+def _naqis_wawi_patient(w: str, root: str) -> str:
+    # مدعو (remove extra و if duplicated at end)
+    if w.endswith('وو'):
+        return w[:-1]
+    return _fix_naqis_patient(w, root)
+
+def _naqis_yai_patient(w: str, root: str) -> str:
+    # مبقوي → مبقي (remove inserted و before last root letter)
+    return _fix_naqis_patient(w, root)
+
+def _naqis_alifi_agent(w: str, root: str) -> str:
+    # ناقص ألفي في اسم الفاعل: دعا → داعي (ا → ي)
+    if w.endswith('ا'):
+        return w[:-1] + 'ي'
+    return w
+
+def _naqis_alifi_patient(w: str, root: str) -> str:
+    # ناقص ألفي: دعا → مدعو ، رمى → مرمي
+    # 1) Drop final weak ا/ي
+    if w.endswith(('ا', 'ي')):
+        w = w[:-1]
+    # 2) Ensure it ends with و
+    if not w.endswith('و'):
+        w += 'و'
+    return w
+
+# === لفيف مفروق (Weak at START + END, separated) ===
+def _lafif_mafruq_imperative(w: str, root: str) -> str:
+    # لفيف مفروق في الأمر: نحذف الأول والآخر ونبقي العين فقط (وقى → ق)
+    if len(root) == 3:
+        return root[1]
+    return w
+
+def _lafif_mafruq_agent(w: str, root: str) -> str:
+    # لفيف مفروق في اسم الفاعل: وقى → واقٍ
+    if len(w) >= 2 and root[2] in ['و', 'ي', 'ى']:
+        return w[:-1] + 'ٍ'
+    return w
+
+# === لفيف مقرون واوي (Weak at START: و + END: ي) ===
+# Patterns: فَوَى | يَفْوِي | اِفْوِ | فَاوٍ | مَفْوِيّ
+def _lafif_maqrun_wawi_imperative(w: str, root: str) -> str:
+    # اِفْوِ (drop ي from end, keep و)
+    # Pattern gives افوي, should be افو or فو
+    if w.endswith(('ي', 'ا')):
+        return w[:-1]
+    return w
+
+def _lafif_maqrun_wawi_agent(w: str, root: str) -> str:
+    # لفيف مقرون واوي في اسم الفاعل: طاوي → طاوٍ
+    if w.endswith("وي"):
+        return w[:-1] + "ٍ"
+    return w
+
+# (verb_type, pattern_type) -> handler; missing pairs keep the normalized word
+_VERB_HANDLERS: Dict[tuple, Callable[[str, str], str]] = {
+    ("مضاعف", 'imperative'): _mudaaf_imperative,
+
+    ("مهموز الفاء", 'past'): _mahmuz_fa_past,
+    ("مهموز الفاء", 'present'): _mahmuz_fa_present,
+    ("مهموز الفاء", 'imperative'): _mahmuz_fa_imperative,
+    ("مهموز الفاء", 'agent'): _mahmuz_fa_agent,
+    ("مهموز الفاء", 'patient'): _mahmuz_fa_patient,
+
+    ("مهموز العين", 'past'): _mahmuz_ayn_past,
+    ("مهموز العين", 'present'): _mahmuz_ayn_present,
+    ("مهموز العين", 'imperative'): _mahmuz_ayn_imperative,
+    ("مهموز العين", 'agent'): _mahmuz_ayn_agent,
+    # Any other pattern type is treated like the patient noun
+    ("مهموز العين", 'patient'): _mahmuz_ayn_patient,
+    ("مهموز العين", 'unknown'): _mahmuz_ayn_patient,
+
+    ("مهموز اللام", 'past'): _mahmuz_lam,
+    ("مهموز اللام", 'present'): _mahmuz_lam,
+    ("مهموز اللام", 'imperative'): _mahmuz_lam,
+    ("مهموز اللام", 'patient'): _mahmuz_lam,
+
+    ("مثال واوي", 'present'): _mithal_wawi_present,
+    ("مثال واوي", 'imperative'): _mithal_wawi_imperative,
+
+    ("أجوف واوي", 'imperative'): _ajwaf_imperative,
+    ("أجوف واوي", 'agent'): _ajwaf_wawi_agent,
+    ("أجوف يائي", 'imperative'): _ajwaf_imperative,
+    ("أجوف يائي", 'agent'): _ajwaf_yai_agent,
+
+    ("ناقص واوي", 'imperative'): _drop_final_weak_handler,
+    ("ناقص واوي", 'patient'): _naqis_wawi_patient,
+    ("ناقص يائي", 'imperative'): _drop_final_weak_handler,
+    ("ناقص يائي", 'patient'): _naqis_yai_patient,
+    ("ناقص ألفي", 'imperative'): _drop_final_weak_handler,
+    ("ناقص ألفي", 'agent'): _naqis_alifi_agent,
+    ("ناقص ألفي", 'patient'): _naqis_alifi_patient,
+
+    ("لفيف مفروق", 'imperative'): _lafif_mafruq_imperative,
+    ("لفيف مفروق", 'agent'): _lafif_mafruq_agent,
+
+    ("لفيف مقرون واوي", 'imperative'): _lafif_maqrun_wawi_imperative,
+    ("لفيف مقرون واوي", 'agent'): _lafif_maqrun_wawi_agent,
+}
+_VERB_HANDLERS = {(sys.intern(vt), pt): fn for (vt, pt), fn in _VERB_HANDLERS.items()}
+
+def apply_verb_transformations(word: str, root: str, verb_type: str, pattern: str, scheme_id: str = "",
+                               pattern_type: Optional[str] = None) -> str:
+    """Apply morphological transformations based on verb type and pattern.
+
+    `pattern_type` may be passed precomputed (see MorphologicalScheme.pattern_type).
+    """
     if not root or len(root) < 3:
         return word
-    
-    # Keep original root with hamza
-    r1_orig, r2_orig, r3_orig = root[0], root[1], root[2]
-    word_norm = normalize_arabic(word)
-    pattern_type = identify_pattern_type(pattern, scheme_id)
-    
-    # Helper: restore hamza at specific position
-    def restore_hamza(text, pos, char):
-        if pos < len(text):
-            # Accept any form of hamza: أ، إ، آ، ء
-            if char in ('أ', 'إ', 'آ', 'ء'):
-                return text[:pos] + char + text[pos+1:]
-        return text
 
-    # Helper: fix ناقص مفعول - safely remove inserted و before last root letter
-    def fix_naqis_patient(w: str, r: str) -> str:
-        # Only remove an internal و; never touch a final و
-        if len(w) < 3:
-            return w
-        for i in range(len(w) - 1):
-            if w[i] == 'و':
-                return w[:i] + w[i+1:]
-        return w
+    word_norm = normalize_arabic(word)
+    if pattern_type is None:
+        pattern_type = identify_pattern_type(pattern, scheme_id)
 
-    # === 0. صحيح سالم ===
-    if verb_type == "صحيح سالم":
-        return word_norm
-    
-    # === 1. مضاعف ===
-    if verb_type == "مضاعف":
-        if pattern_type == 'imperative' and word_norm.startswith('ا'):
-            return word_norm[1:]
-        return word_norm
-    
-    # === 1.5. مهموز الفاء (Hamza at START) ===
-    if verb_type == "مهموز الفاء":
-        if pattern_type == 'past':
-            return restore_hamza(word_norm, 0, r1_orig)
-
-        elif pattern_type == 'present':
-            if word_norm and word_norm[0] == 'ي':
-                return word_norm[0] + restore_hamza(word_norm[1:], 0, r1_orig)
-            return word_norm
-
-        elif pattern_type == 'imperative':
-            return word_norm[-2:] if len(word_norm) >= 2 else word_norm
-
-        elif pattern_type == 'agent':
-            # Handle important cases: أاكل / ااكل → آكل (only for مهموز الفاء + فاعل)
-            if len(word_norm) >= 2:
-                if (word_norm.startswith('أا') or word_norm.startswith('اا')) and r1_orig == 'أ':
-                    return 'آ' + word_norm[2:]
-
-            return word_norm
-
-        elif pattern_type == 'patient':
-            # مفعول → مأكول: hamza as first root letter (after م)
-            if len(word_norm) >= 2:
-                return word_norm[0] + r1_orig + word_norm[2:]
-            return word_norm
-    
-    # === 1.6. مهموز العين (Hamza at MIDDLE) ===
-    if verb_type == "مهموز العين":
-        if pattern_type == 'past':
-            # فَأَعَلَ - restore hamza at position 1
-            return restore_hamza(word_norm, 1, r2_orig)
-        elif pattern_type == 'present':
-            # يَفْأَعَلُ - restore hamza at position 2 (after ي + first consonant)
-            if word_norm.startswith('ي'):
-                return word_norm[0:2] + restore_hamza(word_norm[2:], 0, r2_orig)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # اِفْأَعَلْ - restore hamza at position 1 (after ا + first consonant)
-            if word_norm.startswith('ا'):
-                return word_norm[0:2] + restore_hamza(word_norm[2:], 0, r2_orig)
-            return word_norm
-        elif pattern_type == 'agent':
-            # Fix مهموز العين in فاعل: ساأل / ساال → سائل
-            # Rule: ا + (ء or normalized ا from hamza) → ائ
-            if len(word_norm) >= 3:
-                # Case 1: normalized form (ساال)
-                if word_norm[1] == 'ا' and word_norm[2] == 'ا':
-                    return word_norm[0] + 'ائ' + word_norm[3:]
-                # Case 2: original root has hamza as عين (سأل، قرأ، ملأ)
-                if word_norm[1] == 'ا' and root[1] in ['ء', 'أ', 'إ', 'آ']:
-                    return word_norm[0] + 'ائ' + word_norm[3:]
-            return word_norm
-        else:  # patient
-            # مَفْؤُول - hamza in position 2
-            return word_norm[:2] + restore_hamza(word_norm[2:], 0, r2_orig) if len(word_norm) >= 3 else word_norm
-    
-    # === 1.7. مهموز اللام (Hamza at END) ===
-    if verb_type == "مهموز اللام":
-        # All patterns: keep word_norm and restore hamza at end
-        if pattern_type in ['past', 'present', 'imperative', 'patient']:
-            # Restore hamza at last position
-            return restore_hamza(word_norm, len(word_norm) - 1, r3_orig)
-        return word_norm
-    
-    # === 2. مثال واوي (Weak at START: و) ===
-    # Patterns: وَفَعَلَ | يَفْعِلُ | فِعْلْ | فَاعِل | مَفْعُول
-    if verb_type == "مثال واوي":
-        if pattern_type == 'past':
-            # Keep: وَفَعَلَ (weak و at start)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفْعِلُ (drop weak و, keep valid present prefix)
-            # Example: يوجد → يجد
-            if len(word_norm) >= 3:
-                prefix = word_norm[0]
-                if prefix in ['ي', 'ت', 'ن', 'أ'] and word_norm[1] == 'و':
-                    return prefix + word_norm[2:]
-            return word_norm
-        elif pattern_type == 'imperative':
-            # فِعْلْ (drop ا prefix AND weak و)
-            # Pattern gives افْعَل, word is اوعد
-            # Result: عد (remove ا and و)
-            if len(word_norm) >= 3 and word_norm.startswith('ا') and word_norm[1] == 'و':
-                return word_norm[2:]
-            return word_norm
-        else:  # agent, patient
-            return word_norm
-    
-    # === 2.1. مثال يائي (Weak at START: ي) ===
-    # Patterns: يَفْعَلَ | يَفْعَلُ | اِفْعَلْ | فَاعِل | مَفْعُول
-    if verb_type == "مثال يائي":
-        if pattern_type == 'past':
-            # Keep: يَفْعَلَ (ي at start, but not counted as weak in classical sense)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفْعَلُ (normal present)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # اِفْعَلْ (normal imperative with ا prefix)
-            return word_norm
-        else:  # agent, patient
-            return word_norm
-    
-    # === 3. أجوف واوي (Weak in MIDDLE: و) ===
-    # Patterns: فَالَ | يَفُولُ | فُلْ | فَائِل | مَفُول
-    if verb_type == "أجوف واوي":
-        if pattern_type == 'past':
-            # فَالَ (keep و as alef في الماضي)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفُولُ (damma becomes و in present)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # فُلْ (just ف + ل, no ا prefix, و becomes damma before ل)
-            # Pattern gives اقال, should be قل (first and last letter only)
-            if len(word_norm) >= 2:
-                return word_norm[0] + word_norm[-1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # فَائِل (ا + ي + ل, with hamza)
-            if 'ال' in word_norm or 'او' in word_norm:
-                word_norm = word_norm.replace('ال', 'ائ').replace('او', 'ائ')
-            return word_norm
-        elif pattern_type == 'patient':
-            # مَفُول (keep و)
-            return word_norm
-    
-    # === 3.1. أجوف يائي (Weak in MIDDLE: ي) ===
-    # Patterns: فَالَ | يَفِيلُ | فِلْ | فَائِل | مَفِيل
-    if verb_type == "أجوف يائي":
-        if pattern_type == 'past':
-            # فَالَ (ي as alef في الماضي)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفِيلُ (ي with kasra)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # فِلْ (just ف + ل, with kasra, no ا prefix)
-            # Pattern gives اقال, should be قل (first and last letter only)
-            if len(word_norm) >= 2:
-                return word_norm[0] + word_norm[-1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # فَائِل (ا + ي + ل, with hamza)
-            if 'ال' in word_norm or 'اي' in word_norm:
-                word_norm = word_norm.replace('ال', 'ائ').replace('اي', 'ائ')
-            return word_norm
-        elif pattern_type == 'patient':
-            # مَفِيل (ي in patient)
-            return word_norm
-    
-    # === 4. ناقص واوي (Weak at END: و) ===
-    # Patterns: فَعَا | يَفْعُو | اِفْعُ | فَاعٍ | مَفْعُوّ
-    if verb_type == "ناقص واوي":
-        if pattern_type == 'past':
-            # فَعَا (ا from pattern, و from root)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفْعُو (damma before و)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # اِفْعُ (drop weak end)
-            # Pattern gives افعا, should drop ا → افع
-            if word_norm.endswith('ا') or word_norm.endswith('و') or word_norm.endswith('ي'):
-                return word_norm[:-1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # ناقص واوي في فاعل: دعا → داعي (لا نحذف الحرف الأخير)
-            return word_norm
-        elif pattern_type == 'patient':
-            # مدعو (remove extra و if duplicated at end)
-            if word_norm.endswith('وو'):
-                return word_norm[:-1]
-            return fix_naqis_patient(word_norm, root)
-    
-    # === 4.1. ناقص يائي (Weak at END: ي/ى) ===
-    # Patterns: فَعَى | يَفْعِي | اِفْعِ | فَاعٍ | مَفْعِيّ
-    if verb_type == "ناقص يائي":
-        if pattern_type == 'past':
-            # فَعَى (ا from pattern becomes ى)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفْعِي (ي with kasra)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # اِفْعِ (drop weak end)
-            # Pattern gives افعي, should drop ي → افع
-            if word_norm.endswith('ا') or word_norm.endswith('و') or word_norm.endswith('ي'):
-                return word_norm[:-1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # ناقص يائي في اسم الفاعل: بقي → باقي (لا نحذف الحرف الأخير)
-            return word_norm
-        elif pattern_type == 'patient':
-            # مبقوي → مبقي (remove inserted و before last root letter)
-            return fix_naqis_patient(word_norm, root)
-    
-    # ===  4.2. ناقص ألفي (Weak at END: ا) ===
-    if verb_type == "ناقص ألفي":
-        if pattern_type == 'past':
-            # Keep ا
-            return word_norm
-        elif pattern_type == 'present':
-            # Keep ا or convert
-            return word_norm
-        elif pattern_type == 'imperative':
-            # Drop weak end
-            if word_norm.endswith('ا') or word_norm.endswith('و') or word_norm.endswith('ي'):
-                return word_norm[:-1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # ناقص ألفي في اسم الفاعل: دعا → داعي (ا → ي)
-            if word_norm.endswith('ا'):
-                return word_norm[:-1] + 'ي'
-            return word_norm
-        elif pattern_type == 'patient':
-            # ناقص ألفي: دعا → مدعو ، رمى → مرمي
-            # 1) Drop final weak ا/ي
-            if word_norm.endswith(('ا', 'ي')):
-                word_norm = word_norm[:-1]
-            # 2) Ensure it ends with و
-            if not word_norm.endswith('و'):
-                word_norm += 'و'
-            return word_norm
-    
-    # === 5. لفيف مفروق (Weak at START + END, separated) ===
-    if verb_type == "لفيف مفروق":
-        if pattern_type == 'past':
-            return word_norm
-        elif pattern_type == 'present':
-            return word_norm
-        elif pattern_type == 'imperative':
-            # لفيف مفروق في الأمر: نحذف الأول والآخر ونبقي العين فقط (وقى → ق)
-            if len(root) == 3:
-                return root[1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # لفيف مفروق في اسم الفاعل: وقى → واقٍ
-            if len(word_norm) >= 2 and root[2] in ['و', 'ي', 'ى']:
-                return word_norm[:-1] + 'ٍ'
-            return word_norm
-        else:  # patient
-            return word_norm
-    
-    # === 6. لفيف مقرون واوي (Weak at START: و + END: ي) ===
-    # Patterns: فَوَى | يَفْوِي | اِفْوِ | فَاوٍ | مَفْوِيّ
-    if verb_type == "لفيف مقرون واوي":
-        if pattern_type == 'past':
-            # فَوَى (keep و and ي as ا)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفْوِي (و with fatha, ي with kasra)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # اِفْوِ (drop ي from end, keep و)
-            # Pattern gives افوي, should be افو or فو
-            if word_norm.endswith('ي') or word_norm.endswith('ا'):
-                return word_norm[:-1]
-            return word_norm
-        elif pattern_type == 'agent':
-            # لفيف مقرون واوي في اسم الفاعل: طاوي → طاوٍ
-            if word_norm.endswith("وي"):
-                return word_norm[:-1] + "ٍ"
-            return word_norm
-        elif pattern_type == 'patient':
-            # مَفْوِيّ (و + ي with doubled ي)
-            return word_norm
-    
-    # === 6.1. لفيف مقرون يائي (Weak at START: ي + END: ي) ===
-    # Patterns: فَيَى | يَفْيِي | اِفْيِ | فَايٍ | مَفْيِيّ
-    if verb_type == "لفيف مقرون يائي":
-        if pattern_type == 'past':
-            # فَيَى (keep ي twice, second becomes ا)
-            return word_norm
-        elif pattern_type == 'present':
-            # يَفْيِي (both ي with kasra)
-            return word_norm
-        elif pattern_type == 'imperative':
-            # اِفْيِ (keep both ي)
-            # Pattern gives افيي, already correct
-            return word_norm
-        elif pattern_type == 'agent':
-            # فَايٍ (ي + ي with nunation)
-            return word_norm
-        elif pattern_type == 'patient':
-            # مَفْيِيّ (ي + ي with doubled ي)
-            return word_norm
-    
-    # === DEFAULT: Return normalized word ===
-    return word_norm
+    handler = _VERB_HANDLERS.get((verb_type, pattern_type))
+    return handler(word_norm, root) if handler is not None else word_norm
 
 
 # --- Irregular Verb Rules (I'Lal & Ibdal) from verb_rules.txt ---
 
 VERB_RULES_TXT_FILE = "data/verb_rules.txt"
-_IRREGULAR_RULES: Dict[str, List[tuple]] = {}  # key -> [(op, args), ...]
+_COMPILED_RULES: Dict[str, Callable[[str], str]] = {}  # key -> word transform
+# One op of a rule line: "replace=A>B" or "replace_final=B", separated by ';'.
+# Anything else (e.g. a stray '=طاو') is ignored.
+_RULE_OP_RE = re.compile(r'(?:^|;)\s*(replace_final|replace)=([^;]*)')
+
+# Rule key prefix for every verb type detect_verb_type can return
+_RULE_PREFIX = {
+    "مثال": "mithal", "مثال واوي": "mithal", "مثال يائي": "mithal",
+    "أجوف": "ajwaf", "أجوف واوي": "ajwaf", "أجوف يائي": "ajwaf",
+    "ناقص يائي": "naqis", "ناقص واوي": "naqis", "ناقص ألفي": "naqis",
+    "لفيف مفروق": "lafif", "لفيف مقرون": "lafif",
+    "لفيف مقرون واوي": "lafif", "لفيف مقرون يائي": "lafif",
+    "مهموز الفاء": "mahmouz", "مهموز العين": "mahmouz", "مهموز اللام": "mahmouz",
+    "صحيح سالم": "sahih", "مضاعف": "sahih",
+}
+_RULE_PREFIX = {sys.intern(vt): prefix for vt, prefix in _RULE_PREFIX.items()}
 
 def _verb_type_to_rule_prefix(verb_type: str) -> Optional[str]:
     """Map verb type to rule key prefix (mithal, ajwaf, naqis, lafif, mahmouz, sahih)."""
-    if not verb_type:
-        return None
-    if "مثال" in verb_type:
-        return "mithal"
-    if "أجوف" in verb_type:
-        return "ajwaf"
-    if "ناقص" in verb_type:
-        return "naqis"
-    if "لفيف" in verb_type:
-        return "lafif"
-    if "مهموز" in verb_type:
-        return "mahmouz"
-    if "صحيح" in verb_type or "مضاعف" in verb_type:
-        return "sahih"
-    return None
+    return _RULE_PREFIX.get(verb_type)
 
 
 def _load_irregular_rules():
-    """Load and parse verb_rules.txt into _IRREGULAR_RULES."""
-    global _IRREGULAR_RULES
-    _IRREGULAR_RULES = {}
+    """Load verb_rules.txt and compile each rule line into _COMPILED_RULES."""
+    global _COMPILED_RULES
+    _COMPILED_RULES = {}
+    # Memoized derivations were computed with the previous rules
+    derive_word.cache_clear()
     if not os.path.exists(VERB_RULES_TXT_FILE):
         return
     try:
@@ -599,33 +567,67 @@ def _load_irregular_rules():
                 key, ops_str = line.split(":", 1)
                 key = key.strip()
                 ops = []
-                for op in ops_str.split(";"):
-                    op = op.strip()
-                    if not op:
-                        continue
-                    # Ignore malformed ops that start with '=' (e.g. '=طاو')
-                    if op.startswith("="):
-                        continue
-                    if op.startswith("replace="):
+                for name, value in _RULE_OP_RE.findall(ops_str):
+                    if name == "replace":
                         # replace=A>B (B may be empty, e.g. replace=او>)
-                        part = op[8:].strip()
-                        if ">" in part:
-                            a, b = part.split(">", 1)
-                            a = a.strip()
-                            b = b.strip()
-                            # Skip empty source (replace=>X would corrupt everything)
-                            if a:
-                                ops.append(("replace", (a, b)))
-                    elif op.startswith("replace_final="):
-                        # replace_final=B
-                        b = op[13:].strip()
-                        ops.append(("replace_final", (b,)))
+                        a, sep, b = value.partition(">")
+                        a = a.strip()
+                        # Skip empty source (replace=>X would corrupt everything)
+                        if sep and a:
+                            ops.append(("replace", (a, b.strip())))
+                    else:
+                        ops.append(("replace_final", (value.strip(),)))
                 # Store even empty ops (e.g. sahih_يفعل: = no change)
-                _IRREGULAR_RULES[key] = ops
+                _COMPILED_RULES[key] = _compile_rule_ops(ops)
     except Exception as e:
         print(f"Error loading verb_rules.txt: {e}")
 
 
+def _compile_rule_ops(ops: List[tuple]) -> Callable[[str], str]:
+    """Turn a parsed rule into one function applying its ops in order.
+
+    A run of single-letter replacements becomes one str.translate when that is
+    equivalent to applying them one by one, i.e. no replacement produces a letter
+    that the run replaces.
+    """
+    steps = []
+    i = 0
+    while i < len(ops):
+        op, args = ops[i]
+        if op == "replace_final":
+            steps.append(lambda w, b=args[0]: w[:-1] + b if w else w)
+            i += 1
+            continue
+        # Collect consecutive single-letter replacements
+        j = i
+        while j < len(ops) and ops[j][0] == "replace" and len(ops[j][1][0]) == 1:
+            j += 1
+        run = ops[i:j]
+        sources = {a for _, (a, _b) in run}
+        if len(run) > 1 and not any(c in sources for _, (_a, b) in run for c in b):
+            table = {}
+            for _, (a, b) in run:
+                # A repeated source is already gone by its second op
+                table.setdefault(a, b or None)
+            steps.append(lambda w, t=str.maketrans(table): w.translate(t))
+            i = j
+        else:
+            a, b = args
+            steps.append(lambda w, a=a, b=b: w.replace(a, b))
+            i += 1
+
+    if not steps:
+        return lambda w: w
+    if len(steps) == 1:
+        return steps[0]
+
+    def apply(word: str) -> str:
+        for step in steps:
+            word = step(word)
+        return word
+    return apply
+
+
 def _apply_irregular_rules(word: str, root: str, verb_type: str, scheme_id: str) -> str:
     """
     Apply irregular verb rules from verb_rules.txt.
@@ -640,49 +642,69 @@ def _apply_irregular_rules(word: str, root: str, verb_type: str, scheme_id: str)
         return word
 
     # 1. Exception first (e.g. exception_قال_فاعل, exception_باع_مفعول)
-    exc_key = f"exception_{root}_{scheme_id}"
-    if exc_key in _IRREGULAR_RULES:
-        for op, args in _IRREGULAR_RULES[exc_key]:
-            if op == "replace":
-                a, b = args
-                if a:
-                    word = word.replace(a, b)
-            elif op == "replace_final" and len(word) >= 1:
-                word = word[:-1] + args[0]
-        return word
+    rule = _COMPILED_RULES.get(f"exception_{root}_{scheme_id}")
+    if rule is not None:
+        return rule(word)
 
     # 2. Apply verb-type + scheme rules
     prefix = _verb_type_to_rule_prefix(verb_type)
     if not prefix:
         return word
 
-    rule_key = f"{prefix}_{scheme_id}"
-    if rule_key not in _IRREGULAR_RULES:
-        return word
+    rule = _COMPILED_RULES.get(f"{prefix}_{scheme_id}")
+    return rule(word) if rule is not None else word
 
-    for op, args in _IRREGULAR_RULES[rule_key]:
-        if op == "replace":
-            a, b = args
-            if a:
-                word = word.replace(a, b)
-        elif op == "replace_final" and len(word) >= 1:
-            word = word[:-1] + args[0]
 
-    return word
+@lru_cache(maxsize=16384)
+def derive_word(root: str, pattern: str, scheme_id: str, verb_type: str,
+                pattern_type: Optional[str] = None) -> str:
+    """Run the full derivation pipeline for one root and scheme.
+
+    Memoized: the result depends only on the arguments (and the irregular rules,
+    which clear this cache when reloaded). The pattern is part of the key, so
+    editing a scheme never serves a stale word.
+    """
+    word = apply_pattern(root, pattern, verb_type)
+    # Apply verb-specific transformations (pass pattern and scheme_id for context)
+    word = apply_verb_transformations(word, root, verb_type, pattern, scheme_id, pattern_type)
+    # Apply irregular verb rules from verb_rules.txt (I'Lal & Ibdal)
+    word = _apply_irregular_rules(word, root, verb_type, scheme_id)
+    # Final safety: strip stray '=' from rule parsing glitches
+    return word.replace("=", "").strip()
 
 
 # --- Data Structures ---
 
-class DerivedWord(BaseModel):
+# Tree payloads are plain dataclasses: they are created on every insert/load and
+# never need request validation (FastAPI serializes dataclasses natively).
+@dataclass
+class DerivedWord:
     word: str
     frequency: int = 1
     scheme_id: Optional[str] = None
     pattern: Optional[str] = None
 
-class RootNodeData(BaseModel):
+@dataclass
+class RootNodeData:
     root: str
-    derived_words: List[DerivedWord] = []
+    derived_words: List[DerivedWord] = field(default_factory=list)
     verb_type: Optional[str] = None  # Added: verb type detection
+    # (word, scheme_id) -> entry of derived_words, for O(1) history updates
+    derived_index: Dict[tuple, DerivedWord] = field(default_factory=dict, repr=False, compare=False)
+
+    def reindex(self):
+        """Rebuild derived_index after derived_words was replaced or edited in place."""
+        self.derived_index = {}
+        for dw in self.derived_words:
+            self.derived_index.setdefault((dw.word, dw.scheme_id), dw)
+
+    def find_derived(self, word: str, scheme_id: Optional[str]) -> Optional[DerivedWord]:
+        return self.derived_index.get((word, scheme_id))
+
+    def add_derived(self, dw: DerivedWord) -> DerivedWord:
+        self.derived_words.append(dw)
+        self.derived_index.setdefault((dw.word, dw.scheme_id), dw)
+        return dw
 
 
 class VerbTypeInfo(BaseModel):
@@ -693,6 +715,8 @@ class VerbTypeInfo(BaseModel):
     transformations: Dict
 
 class AVLNode:
+    __slots__ = ('data', 'left', 'right', 'height')
+
     def __init__(self, data: RootNodeData):
         self.data = data
         self.left = None
@@ -702,6 +726,10 @@ class AVLNode:
 class AVLTree:
     def __init__(self):
         self.root = None
+        # Exact-match index: root string -> node data (the tree keeps order and balance)
+        self._index: Dict[str, RootNodeData] = {}
+        # Bumped whenever a node is added, i.e. whenever the tree shape changes
+        self.version = 0
 
     def _get_height(self, node):
         return node.height if node else 0
@@ -727,21 +755,57 @@ class AVLTree:
         y.height = 1 + max(self._get_height(y.left), self._get_height(y.right))
         return y
 
-    def insert(self, root_str: str):
-        self.root = self._insert(self.root, root_str)
-
-    def _insert(self, node, root_str):
-        if not node:
-            return AVLNode(RootNodeData(root=root_str, verb_type=detect_verb_type(root_str)))
-        if root_str < node.data.root:
-            node.left = self._insert(node.left, root_str)
-        elif root_str > node.data.root:
-            node.right = self._insert(node.right, root_str)
-        else:
-            # Update verb type in case it was recalculated
-            node.data.verb_type = detect_verb_type(root_str)
+    def insert(self, root_str: str) -> RootNodeData:
+        """Add a root (or refresh its verb type) and return its node data."""
+        existing = self._index.get(root_str)
+        if existing is not None:
+            # Already in the tree: no descent needed, just update verb type in case it was recalculated
+            existing.verb_type = detect_verb_type(root_str)
+            return existing
+
+        # Iterative descent, remembering the path so it can be rebalanced bottom-up
+        path = []  # (ancestor, went_left)
+        node = self.root
+        while node:
+            # root_str is not in the tree (checked above), so it never equals a node
+            went_left = root_str < node.data.root
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+
+        data = RootNodeData(root=root_str, verb_type=detect_verb_type(root_str))
+        subtree = AVLNode(data)
+        self._index[root_str] = data
+        self.version += 1
+        while path:
+            node, went_left = path.pop()
+            if went_left:
+                node.left = subtree
+            else:
+                node.right = subtree
+            subtree = self._rebalance(node, root_str)
+        self.root = subtree
+        return data
+
+    def build_from_sorted(self, items: List[RootNodeData]):
+        """Replace the tree with a perfectly balanced one built from items sorted by root.
+
+        O(n) and rotation-free: each subtree's root is the middle item of its slice.
+        """
+        def build(lo, hi):
+            if lo > hi:
+                return None
+            mid = (lo + hi) // 2
+            node = AVLNode(items[mid])
+            node.left = build(lo, mid - 1)
+            node.right = build(mid + 1, hi)
+            node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
             return node
 
+        self.root = build(0, len(items) - 1)
+        self._index = {item.root: item for item in items}
+        self.version += 1
+
+    def _rebalance(self, node, root_str):
         node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
         balance = self._get_balance(node)
 
@@ -758,134 +822,376 @@ class AVLTree:
         return node
 
     def search(self, root_str: str) -> Optional[RootNodeData]:
-        curr = self.root
-        while curr:
-            if root_str == curr.data.root: return curr.data
-            curr = curr.left if root_str < curr.data.root else curr.right
-        return None
+        return self._index.get(root_str)
 
     def get_all(self) -> List[RootNodeData]:
+        # Iterative in-order walk with an explicit stack
         res = []
-        def traverse(node):
-            if node:
-                traverse(node.left)
-                res.append(node.data)
-                traverse(node.right)
-        traverse(self.root)
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            res.append(node.data)
+            node = node.right
         return res
 
     def get_visual(self):
-        def map_node(node):
-            if not node: return None
-            return {
+        # Iterative post-order: both children are mapped before their parent
+        if not self.root:
+            return None
+        mapped = {}
+        stack = [(self.root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                if node.right: stack.append((node.right, False))
+                if node.left: stack.append((node.left, False))
+                continue
+            left, right = node.left, node.right
+            mapped[node] = {
                 "name": node.data.root,
-                "balance": self._get_balance(node),
-                "children": [n for n in [map_node(node.left), map_node(node.right)] if n]
+                "balance": (left.height if left else 0) - (right.height if right else 0),
+                "children": [mapped.pop(c) for c in (left, right) if c]
             }
-        return map_node(self.root)
+        return mapped[self.root]
 
 class MorphologicalScheme(BaseModel):
     id: str
     pattern: str
     transformationRule: str
+    # Filled in by HashTable.put; not part of the API payload
+    _pattern_type: Optional[str] = PrivateAttr(default=None)
+
+    @property
+    def pattern_type(self) -> str:
+        """Morphological form of this scheme (see identify_pattern_type)."""
+        if self._pattern_type is None:
+            self._pattern_type = identify_pattern_type(self.pattern, self.id)
+        return self._pattern_type
 
 class HashTable:
-    def __init__(self, size=101):
-        self.size = size
-        self.buckets = [[] for _ in range(size)]
+    """Scheme table keyed by scheme id, backed by Python's built-in dict (C-level hashing).
 
-    def _hash(self, key: str) -> int:
-        return sum(ord(c) * (i + 1) for i, c in enumerate(key)) % self.size
+    Iteration follows insertion order, so schemes keep the order they were loaded/added in.
+    """
+    def __init__(self):
+        self._table: Dict[str, MorphologicalScheme] = {}
+        # Snapshot returned by get_all; dropped (never mutated) on put/delete
+        self._all: Optional[List[MorphologicalScheme]] = None
 
     def put(self, scheme: MorphologicalScheme):
-        idx = self._hash(scheme.id)
-        for i, s in enumerate(self.buckets[idx]):
-            if s.id == scheme.id:
-                self.buckets[idx][i] = scheme
-                return
-        self.buckets[idx].append(scheme)
+        # Classify once here instead of on every derivation
+        scheme._pattern_type = identify_pattern_type(scheme.pattern, scheme.id)
+        self._table[scheme.id] = scheme
+        self._all = None
 
     def get(self, id: str) -> Optional[MorphologicalScheme]:
-        idx = self._hash(id)
-        for s in self.buckets[idx]:
-            if s.id == id: return s
-        return None
+        return self._table.get(id)
 
     def get_all(self) -> List[MorphologicalScheme]:
-        return [s for b in self.buckets for s in b]
+        """All schemes in insertion order. The list is shared: callers must not modify it."""
+        if self._all is None:
+            self._all = list(self._table.values())
+        return self._all
 
     def delete(self, id: str) -> bool:
-        idx = self._hash(id)
-        for i, s in enumerate(self.buckets[idx]):
-            if s.id == id:
-                del self.buckets[idx][i]
-                return True
-        return False
+        if self._table.pop(id, None) is None:
+            return False
+        self._all = None
+        return True
 
 # --- App State & Persistence ---
 
 root_tree = AVLTree()
 scheme_table = HashTable()
 
+# Bumped on every scheme add/update/delete; keys the validation cache below
+_scheme_version = 0
+# Bumped on every root insert or history change; keys the /api/roots cache
+_roots_version = 0
+
+
+def schemes_changed():
+    """Invalidate everything derived from the scheme table."""
+    global _scheme_version
+    _scheme_version += 1
+
+
+def roots_changed():
+    """Invalidate everything derived from the roots and their history."""
+    global _roots_version
+    _roots_version += 1
+
+
+# Read endpoint bodies: name -> (version, serialized JSON)
+_read_cache: Dict[str, tuple] = {}
+
+
+def cached_read(name: str, version: int, build) -> Response:
+    """Serve the body cached for `name` if it was built at `version`, else rebuild it.
+
+    The JSON bytes are cached (not the payload), so repeat reads skip
+    serialization. Each request still gets its own Response object because
+    middleware (CORS) edits response headers in place.
+    """
+    hit = _read_cache.get(name)
+    if hit is None or hit[0] != version:
+        hit = (version, orjson.dumps(build()))
+        _read_cache[name] = hit
+    return Response(content=hit[1], media_type="application/json")
+
+
+@lru_cache(maxsize=1024)
+def validation_index(root_str: str, verb_type: str, scheme_version: int) -> Dict[str, tuple]:
+    """Map each normalized derivable word of a root to (scheme_id, pattern).
+
+    The first scheme producing a word wins, matching the scan order of the
+    table. `scheme_version` is only part of the cache key.
+    """
+    index: Dict[str, tuple] = {}
+    for s in scheme_table.get_all():
+        generated = derive_word(root_str, s.pattern, s.id, verb_type, s.pattern_type)
+        index.setdefault(normalize_arabic(generated), (s.id, s.pattern))
+    return index
+
 # Updated paths to use data/ folder
 ROOTS_DATA_FILE = "data/roots_data.json"
 ROOTS_TXT_FILE = "data/racine.txt"
 SCHEMES_DATA_FILE = "data/schemes_data.json"
+ROOTS_WAL_FILE = "data/roots.wal"
+# Version of the roots snapshot. Bump it whenever detect_verb_type changes so
+# the verb types stored in older snapshots are recomputed on load.
+ROOTS_SCHEMA_VERSION = 2
 VERB_RULES_FILE = "data/rules_verbs.json"
 
 # Load verb rules on startup
 VERB_RULES = []
+# Verb type -> rule, rebuilt by load_verb_rules
+VERB_RULES_BY_TYPE: Dict[str, dict] = {}
+# Validated VerbTypeInfo per type; the rules are static once loaded
+VERB_INFO_BY_TYPE: Dict[str, VerbTypeInfo] = {}
 
 
 def load_verb_rules():
     """Load verb type rules from JSON file."""
-    global VERB_RULES
-    if not os.path.exists(VERB_RULES_FILE):
-        VERB_RULES = []
-        return
-    try:
-        with open(VERB_RULES_FILE, "r", encoding="utf-8") as f:
-            VERB_RULES = json.load(f)
-    except Exception as e:
-        print(f"Error loading verb rules: {e}")
-        VERB_RULES = []
+    global VERB_RULES, VERB_RULES_BY_TYPE, VERB_INFO_BY_TYPE
+    VERB_RULES = []
+    if os.path.exists(VERB_RULES_FILE):
+        try:
+            with open(VERB_RULES_FILE, "rb") as f:
+                VERB_RULES = orjson.loads(f.read())
+        except Exception as e:
+            print(f"Error loading verb rules: {e}")
+            VERB_RULES = []
+
+    VERB_RULES_BY_TYPE = {}
+    VERB_INFO_BY_TYPE = {}
+    for rule in VERB_RULES:
+        if rule.get("type") is not None:
+            # First rule of a type wins, as the old linear scans did
+            VERB_RULES_BY_TYPE.setdefault(rule["type"], rule)
 
 def get_verb_info(verb_type: str) -> Optional[VerbTypeInfo]:
     """Get detailed information about a verb type."""
-    for rule in VERB_RULES:
-        if rule.get("type") == verb_type:
-            return VerbTypeInfo(**rule)
-    return None
+    info = VERB_INFO_BY_TYPE.get(verb_type)
+    if info is None:
+        rule = VERB_RULES_BY_TYPE.get(verb_type)
+        if not rule:
+            return None
+        info = VERB_INFO_BY_TYPE[verb_type] = VerbTypeInfo(**rule)
+    return info
 
 
-def save_roots_to_disk():
-    """Persist all roots to JSON and plain-text files."""
+def derived_word_to_dict(dw: DerivedWord) -> dict:
+    return {
+        "word": dw.word,
+        "frequency": dw.frequency,
+        "scheme_id": dw.scheme_id,
+        "pattern": dw.pattern,
+    }
+
+
+def root_to_dict(r: RootNodeData) -> dict:
+    """Plain-dict form of a root for the API (the snapshot is built in _roots_snapshot)."""
+    return {
+        "root": r.root,
+        "verb_type": r.verb_type,
+        "derived_words": [derived_word_to_dict(dw) for dw in r.derived_words],
+    }
+
+
+def scheme_to_dict(s: MorphologicalScheme) -> dict:
+    return {
+        "id": s.id,
+        "pattern": s.pattern,
+        "transformationRule": s.transformationRule,
+    }
+
+
+def _roots_snapshot():
+    """Serialize roots on the event loop so only file I/O runs off it."""
     data = []
     roots = []
     for r in root_tree.get_all():
         roots.append(r.root)
-        # r is RootNodeData
-        data.append({
-            "root": r.root,
-            "verb_type": r.verb_type,
-            "derived_words": [
-                {
-                    "word": dw.word,
-                    "frequency": dw.frequency,
-                    "scheme_id": dw.scheme_id,
-                    "pattern": dw.pattern,
-                }
-                for dw in r.derived_words
-            ]
-        })
+        # orjson serializes the DerivedWord dataclasses natively (same keys as
+        # derived_word_to_dict); RootNodeData itself can't be, its derived_index
+        # has tuple keys.
+        data.append({"root": r.root, "verb_type": r.verb_type, "derived_words": r.derived_words})
+    payload = orjson.dumps({"version": ROOTS_SCHEMA_VERSION, "roots": data}, option=orjson.OPT_INDENT_2)
+    return payload, roots
+
+
+def _file_has_content(path: str, content: bytes) -> bool:
+    try:
+        if os.path.getsize(path) != len(content):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == content
+    except OSError:
+        return False
+
+
+def _atomic_write(path: str, content: bytes):
+    """Replace `path` with `content` so a crash leaves either the old or the new file."""
+    if _file_has_content(path, content):
+        # e.g. startup re-saving what was just loaded: skip the write and fsync
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+        f.flush()
+        # Durable before the rename (and before the WAL it covers is discarded)
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_roots(payload: bytes, roots):
+    """Write a roots snapshot to the JSON and plain-text files."""
     # Ensure data directory exists
     os.makedirs("data", exist_ok=True)
-    with open(ROOTS_DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    with open(ROOTS_TXT_FILE, "w", encoding="utf-8") as f:
-        f.write("\n".join(roots))
-        if roots:
-            f.write("\n")
+    _atomic_write(ROOTS_DATA_FILE, payload)
+    text = "\n".join(roots) + "\n" if roots else ""
+    _atomic_write(ROOTS_TXT_FILE, text.encode("utf-8"))
+
+
+def save_roots_to_disk():
+    """Persist all roots to JSON and plain-text files."""
+    _rotate_wal()
+    _write_roots(*_roots_snapshot())
+    _discard_rotated_wal()
+
+
+# --- Roots Write-Ahead Log ---
+# Mutations are appended as one JSON line each; the full snapshot above is only
+# rewritten every WAL_SNAPSHOT_EVERY records or WAL_SNAPSHOT_BYTES of log (and
+# on shutdown). Records are
+# idempotent upserts (derive carries the resulting frequency), so replaying a
+# log that the snapshot already covers is harmless.
+
+WAL_SNAPSHOT_EVERY = 100
+WAL_SNAPSHOT_BYTES = 1024 * 1024
+_wal_file = None
+_wal_appends = 0
+_wal_bytes = 0
+
+
+def append_wal(record: dict):
+    """Append one mutation record to the roots log, snapshotting every N records or bytes."""
+    global _wal_file, _wal_appends, _wal_bytes
+    if _wal_file is None:
+        os.makedirs("data", exist_ok=True)
+        _wal_file = open(ROOTS_WAL_FILE, "ab")
+        _wal_bytes = _wal_file.tell()
+    line = orjson.dumps(record) + b"\n"
+    _wal_file.write(line)
+    _wal_file.flush()
+    _wal_appends += 1
+    _wal_bytes += len(line)
+    if _wal_appends >= WAL_SNAPSHOT_EVERY or _wal_bytes >= WAL_SNAPSHOT_BYTES:
+        _wal_appends = 0
+        _wal_bytes = 0
+        request_save("roots")
+
+
+def _rotate_wal():
+    """Move the live log aside before a snapshot; new records go to a fresh file."""
+    global _wal_file, _wal_appends, _wal_bytes
+    if _wal_file is not None:
+        _wal_file.close()
+        _wal_file = None
+    _wal_appends = 0
+    _wal_bytes = 0
+    if not os.path.exists(ROOTS_WAL_FILE):
+        return
+    rotated = ROOTS_WAL_FILE + ".old"
+    if os.path.exists(rotated):
+        # A previous snapshot never completed: keep its records
+        with open(rotated, "ab") as dst, open(ROOTS_WAL_FILE, "rb") as src:
+            dst.write(src.read())
+        os.remove(ROOTS_WAL_FILE)
+    else:
+        os.replace(ROOTS_WAL_FILE, rotated)
+
+
+def _discard_rotated_wal():
+    """Drop the rotated log once the snapshot covering it is on disk."""
+    rotated = ROOTS_WAL_FILE + ".old"
+    if os.path.exists(rotated):
+        os.remove(rotated)
+
+
+def _apply_wal_record(record: dict):
+    op = record.get("op")
+    root_str = record.get("root")
+    if not root_str:
+        return
+    if op == "insert_root":
+        root_tree.insert(root_str)
+    elif op == "derive":
+        root_data = root_tree.search(root_str)
+        if not root_data:
+            return
+        word = record.get("word", "")
+        scheme_id = record.get("scheme_id")
+        existing = root_data.find_derived(word, scheme_id)
+        if existing:
+            existing.frequency = record.get("frequency", existing.frequency)
+        else:
+            root_data.add_derived(
+                DerivedWord(
+                    word=word,
+                    frequency=record.get("frequency", 1),
+                    scheme_id=scheme_id,
+                    pattern=record.get("pattern"),
+                )
+            )
+
+
+def replay_wal() -> bool:
+    """Re-apply logged mutations (rotated log first) on top of the loaded snapshot."""
+    replayed = False
+    for path in (ROOTS_WAL_FILE + ".old", ROOTS_WAL_FILE):
+        if not os.path.exists(path):
+            continue
+        # Binary: a torn line may end mid-character, which orjson rejects per line
+        with open(path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Torn last line from an interrupted write
+                    continue
+                _apply_wal_record(record)
+                replayed = True
+    return replayed
 
 
 def load_roots_from_disk():
@@ -893,30 +1199,43 @@ def load_roots_from_disk():
     if not os.path.exists(ROOTS_DATA_FILE):
         return False
     try:
-        with open(ROOTS_DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(ROOTS_DATA_FILE, "rb") as f:
+            data = orjson.loads(f.read())
     except Exception:
         return False
 
+    # Legacy snapshots are a bare list of roots without a version
+    if isinstance(data, dict):
+        trust_verb_types = data.get("version") == ROOTS_SCHEMA_VERSION
+        data = data.get("roots", [])
+    else:
+        trust_verb_types = False
+
+    by_root: Dict[str, RootNodeData] = {}
     for item in data:
         root_str = item.get("root")
         if not root_str:
             continue
-        root_tree.insert(root_str)
-        node_data = root_tree.search(root_str)
-        if not node_data:
-            continue
-        # Always recalculate verb_type to ensure it's current
-        node_data.verb_type = detect_verb_type(root_str)
-        node_data.derived_words = [
-            DerivedWord(
-                word=dw.get("word", ""),
-                frequency=dw.get("frequency", 1),
-                scheme_id=dw.get("scheme_id"),
-                pattern=dw.get("pattern"),
-            )
-            for dw in item.get("derived_words", [])
-        ]
+        verb_type = item.get("verb_type") if trust_verb_types else None
+        node_data = RootNodeData(
+            root=root_str,
+            # Recalculated unless the snapshot was written by this schema version
+            verb_type=sys.intern(verb_type) if verb_type else detect_verb_type(root_str),
+            derived_words=[
+                DerivedWord(
+                    word=dw.get("word", ""),
+                    frequency=dw.get("frequency", 1),
+                    scheme_id=dw.get("scheme_id"),
+                    pattern=dw.get("pattern"),
+                )
+                for dw in item.get("derived_words", [])
+            ],
+        )
+        node_data.reindex()
+        # A repeated root keeps its last record
+        by_root[root_str] = node_data
+    # Snapshot is already known: build the balanced tree directly instead of N inserts
+    root_tree.build_from_sorted([by_root[r] for r in sorted(by_root)])
     return True
 
 
@@ -952,18 +1271,20 @@ def init_roots_in_memory():
         root_tree.insert(r)
 
 
+def _schemes_snapshot():
+    """Collect schemes as plain data so they can be written off the event loop."""
+    return [scheme_to_dict(s) for s in scheme_table.get_all()]
+
+
+def _write_schemes(data):
+    """Write a schemes snapshot to its JSON file."""
+    os.makedirs("data", exist_ok=True)
+    _atomic_write(SCHEMES_DATA_FILE, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
 def save_schemes_to_disk():
     """Persist all schemes (hash table) to a JSON file."""
-    data = []
-    for s in scheme_table.get_all():
-        data.append({
-            "id": s.id,
-            "pattern": s.pattern,
-            "transformationRule": s.transformationRule,
-        })
-    os.makedirs("data", exist_ok=True)
-    with open(SCHEMES_DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    _write_schemes(_schemes_snapshot())
 
 
 def load_schemes_from_disk() -> bool:
@@ -971,8 +1292,8 @@ def load_schemes_from_disk() -> bool:
     if not os.path.exists(SCHEMES_DATA_FILE):
         return False
     try:
-        with open(SCHEMES_DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(SCHEMES_DATA_FILE, "rb") as f:
+            data = orjson.loads(f.read())
     except Exception:
         return False
 
@@ -1008,6 +1329,7 @@ def _backfill_history_patterns() -> bool:
 
     for root_data in root_tree.get_all():
         verb_type = root_data.verb_type or ""
+        root_changed = False
         for dw in root_data.derived_words:
             if dw.scheme_id and dw.pattern:
                 continue
@@ -1017,11 +1339,7 @@ def _backfill_history_patterns() -> bool:
             matched_pattern = None
 
             for s in schemes:
-                generated = apply_pattern(root_data.root, s.pattern, verb_type)
-                generated = apply_verb_transformations(generated, root_data.root, verb_type, s.pattern, s.id)
-                generated = _apply_irregular_rules(generated, root_data.root, verb_type, s.id)
-                generated = generated.replace("=", "").strip()
-
+                generated = derive_word(root_data.root, s.pattern, s.id, verb_type, s.pattern_type)
                 if normalize_arabic(generated) == target:
                     matched_scheme = s.id
                     matched_pattern = s.pattern
@@ -1029,21 +1347,34 @@ def _backfill_history_patterns() -> bool:
 
             if matched_scheme and not dw.scheme_id:
                 dw.scheme_id = matched_scheme
-                changed = True
+                root_changed = True
             if matched_pattern and not dw.pattern:
                 dw.pattern = matched_pattern
-                changed = True
+                root_changed = True
+
+        if root_changed:
+            # scheme_id is part of the history index key
+            root_data.reindex()
+            changed = True
 
     return changed
 
 
-# On startup: try to load roots from disk, otherwise use defaults and save them
+def warm_validation_index():
+    """Build validation indexes up front so early /api/validate calls are lookups."""
+    # Warming more roots than the cache holds would only evict earlier entries
+    limit = validation_index.cache_info().maxsize
+    for root_data in root_tree.get_all()[:limit]:
+        validation_index(root_data.root, root_data.verb_type or "", _scheme_version)
+
+
+# On startup: try to load roots from disk, otherwise use defaults
 if not load_roots_from_disk():
     init_roots_in_memory()
-    save_roots_to_disk()
-else:
-    # Keep plain-text root list synchronized with loaded JSON data
-    save_roots_to_disk()
+# Replay mutations logged since the last snapshot, then fold them into a fresh
+# snapshot (this also keeps the plain-text root list synchronized)
+replay_wal()
+save_roots_to_disk()
 
 # On startup: try to load schemes from disk, otherwise use defaults and save them
 if not load_schemes_from_disk():
@@ -1058,18 +1389,128 @@ _load_irregular_rules()
 if _backfill_history_patterns():
     save_roots_to_disk()
 
+warm_validation_index()
+
+# --- Background Persistence ---
+
+# Endpoints only enqueue a target ("roots" / "schemes"); a single worker drains
+# the queue, so a burst of mutations collapses into one write per target.
+_save_queue: Optional[asyncio.Queue] = None
+_save_task: Optional[asyncio.Task] = None
+# Quiet period after the first request of a burst before writing
+SAVE_DEBOUNCE_SECONDS = 0.5
+# Serializes mutations of root_tree / scheme_table. Handlers don't await inside
+# their critical sections today, but holding the lock keeps a read-check-write
+# sequence atomic if one ever does. Created on first use (see state_lock) so it
+# binds to the running event loop, with or without the startup hook.
+_state_lock: Optional[asyncio.Lock] = None
+
+
+def state_lock() -> asyncio.Lock:
+    """The lock guarding state mutations, created inside the running loop."""
+    global _state_lock
+    if _state_lock is None:
+        _state_lock = asyncio.Lock()
+    return _state_lock
+
+
+def request_save(target: str):
+    """Schedule persistence of "roots" or "schemes" (synchronous outside the server)."""
+    if _save_queue is None:
+        if target == "roots":
+            save_roots_to_disk()
+        else:
+            save_schemes_to_disk()
+        return
+    _save_queue.put_nowait(target)
+
+
+async def _persistence_worker():
+    """Coalesce queued save requests and write each target once per burst."""
+    loop = asyncio.get_running_loop()
+    # Targets whose last write failed; retried with the next burst
+    failed = set()
+    while True:
+        targets = {await _save_queue.get()} | failed
+        failed = set()
+        if None not in targets:
+            # Debounce: let the rest of the burst queue up, then write once
+            await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
+        while not _save_queue.empty():
+            targets.add(_save_queue.get_nowait())
+        # Snapshots are taken on the event loop; only file I/O runs in the executor
+        if "roots" in targets:
+            try:
+                _rotate_wal()
+                await loop.run_in_executor(None, _write_roots, *_roots_snapshot())
+                # Only once the snapshot is on disk; otherwise the rotated log
+                # stays and the next rotation appends to it
+                _discard_rotated_wal()
+            except Exception as e:
+                print(f"Error saving roots: {e}")
+                failed.add("roots")
+        if "schemes" in targets:
+            try:
+                await loop.run_in_executor(None, _write_schemes, _schemes_snapshot())
+            except Exception as e:
+                print(f"Error saving schemes: {e}")
+                failed.add("schemes")
+        if None in targets:  # shutdown sentinel
+            return
+
+
+@app.on_event("startup")
+async def start_persistence_worker():
+    global _save_queue, _save_task, _state_lock
+    # Fresh lock for this server's loop
+    _state_lock = None
+    _save_queue = asyncio.Queue()
+    _save_task = asyncio.create_task(_persistence_worker())
+
+
+@app.on_event("shutdown")
+async def flush_persistence_worker():
+    """Let the worker write anything still queued, then stop it."""
+    global _save_queue, _save_task
+    if _save_task is None:
+        return
+    if _wal_file is not None:
+        # Fold the log into a final snapshot
+        _save_queue.put_nowait("roots")
+    _save_queue.put_nowait(None)
+    await _save_task
+    _save_queue = None
+    _save_task = None
+
+def record_derivation(root_data: RootNodeData, word: str, scheme_id: str, pattern: str):
+    """Bump (or add) a derived word in a root's history and log the change."""
+    existing = root_data.find_derived(word, scheme_id)
+    if existing:
+        existing.frequency += 1
+    else:
+        existing = root_data.add_derived(DerivedWord(word=word, scheme_id=scheme_id, pattern=pattern))
+    roots_changed()
+    append_wal({
+        "op": "derive",
+        "root": root_data.root,
+        "word": existing.word,
+        "scheme_id": existing.scheme_id,
+        "pattern": existing.pattern,
+        "frequency": existing.frequency,
+    })
+
 # --- API Endpoints ---
 
 @app.get("/api/roots")
-def get_roots():
-    return root_tree.get_all()
+async def get_roots():
+    return cached_read("roots", _roots_version, lambda: [root_to_dict(r) for r in root_tree.get_all()])
 
 @app.get("/api/roots/visual")
-def get_roots_visual():
-    return root_tree.get_visual()
+async def get_roots_visual():
+    return cached_read("roots_visual", root_tree.version, root_tree.get_visual)
 
 @app.get("/api/roots/{root}")
-def get_root_details(root: str):
+async def get_root_details(root: str):
     """Get detailed information about a specific root."""
     root_data = root_tree.search(root)
     if not root_data:
@@ -1078,72 +1519,79 @@ def get_root_details(root: str):
         "root": root_data.root,
         "verb_type": root_data.verb_type,
         "verb_info": get_verb_info(root_data.verb_type) if root_data.verb_type else None,
-        "derived_words": root_data.derived_words
+        "derived_words": [derived_word_to_dict(dw) for dw in root_data.derived_words]
     }
 
 @app.get("/api/verb-types")
-def get_verb_types():
+async def get_verb_types():
     """Get all verb types and their rules."""
     return VERB_RULES
 
 @app.get("/api/verb-types/{verb_type}")
-def get_verb_type_details(verb_type: str):
+async def get_verb_type_details(verb_type: str):
     """Get detailed information about a specific verb type."""
-    for rule in VERB_RULES:
-        if rule.get("type") == verb_type:
-            return rule
-    raise HTTPException(404, "Verb type not found")
+    rule = VERB_RULES_BY_TYPE.get(verb_type)
+    if rule is None:
+        raise HTTPException(404, "Verb type not found")
+    return rule
 
 @app.post("/api/roots")
-def add_root(root: str):
+async def add_root(root: str):
     if len(root) != 3: raise HTTPException(400, "Root must be 3 chars")
-    root_tree.insert(root)
-    save_roots_to_disk()
-    root_data = root_tree.search(root)
+    async with state_lock():
+        root_data = root_tree.insert(root)
+        roots_changed()
+        append_wal({"op": "insert_root", "root": root})
     return {
         "status": "ok",
         "root": root,
-        "verb_type": root_data.verb_type if root_data else None
+        "verb_type": root_data.verb_type
     }
 
 @app.get("/api/schemes")
-def get_schemes():
-    return scheme_table.get_all()
+async def get_schemes():
+    return cached_read("schemes", _scheme_version, lambda: [scheme_to_dict(s) for s in scheme_table.get_all()])
 
 @app.post("/api/schemes")
-def add_scheme(scheme: MorphologicalScheme):
-    scheme_table.put(scheme)
-    save_schemes_to_disk()
+async def add_scheme(scheme: MorphologicalScheme):
+    async with state_lock():
+        scheme_table.put(scheme)
+        schemes_changed()
+    request_save("schemes")
     return {"status": "ok"}
 
 
 @app.put("/api/schemes/{scheme_id}")
-def update_scheme(scheme_id: str, scheme: MorphologicalScheme):
-    existing = scheme_table.get(scheme_id)
-    if not existing:
-        raise HTTPException(404, "Scheme not found")
-
-    # If ID changes, ensure new ID is available
-    if scheme.id != scheme_id and scheme_table.get(scheme.id):
-        raise HTTPException(409, "Target scheme ID already exists")
-
-    if scheme.id != scheme_id:
-        scheme_table.delete(scheme_id)
-
-    scheme_table.put(scheme)
-    save_schemes_to_disk()
+async def update_scheme(scheme_id: str, scheme: MorphologicalScheme):
+    async with state_lock():
+        existing = scheme_table.get(scheme_id)
+        if not existing:
+            raise HTTPException(404, "Scheme not found")
+
+        # If ID changes, ensure new ID is available
+        if scheme.id != scheme_id and scheme_table.get(scheme.id):
+            raise HTTPException(409, "Target scheme ID already exists")
+
+        if scheme.id != scheme_id:
+            scheme_table.delete(scheme_id)
+
+        scheme_table.put(scheme)
+        schemes_changed()
+    request_save("schemes")
     return {"status": "ok"}
 
 
 @app.delete("/api/schemes/{scheme_id}")
-def delete_scheme(scheme_id: str):
-    if not scheme_table.delete(scheme_id):
-        raise HTTPException(404, "Scheme not found")
-    save_schemes_to_disk()
+async def delete_scheme(scheme_id: str):
+    async with state_lock():
+        if not scheme_table.delete(scheme_id):
+            raise HTTPException(404, "Scheme not found")
+        schemes_changed()
+    request_save("schemes")
     return {"status": "ok"}
 
 @app.post("/api/generate")
-def generate(root: str, scheme_id: str):
+async def generate(root: str, scheme_id: str):
     """Generate a word by applying a scheme to a root."""
     scheme = scheme_table.get(scheme_id)
     if not scheme: raise HTTPException(404, "Scheme not found")
@@ -1154,27 +1602,11 @@ def generate(root: str, scheme_id: str):
         raise HTTPException(404, "Root not found")
     
     verb_type = root_data.verb_type
-    word = apply_pattern(root, scheme.pattern, verb_type)
-    
-    # Apply verb-specific transformations (pass pattern and scheme_id for context)
-    word = apply_verb_transformations(word, root, verb_type, scheme.pattern, scheme_id)
-    # Apply irregular verb rules from verb_rules.txt (I'Lal & Ibdal)
-    word = _apply_irregular_rules(word, root, verb_type, scheme_id)
-    # Final safety: strip stray '=' from rule parsing glitches
-    word = word.replace("=", "").strip()
+    word = derive_word(root, scheme.pattern, scheme_id, verb_type, scheme.pattern_type)
     
     # Record in history
-    existing = next(
-        (d for d in root_data.derived_words if d.word == word and d.scheme_id == scheme_id),
-        None
-    )
-    if existing:
-        existing.frequency += 1
-    else:
-        root_data.derived_words.append(
-            DerivedWord(word=word, scheme_id=scheme_id, pattern=scheme.pattern)
-        )
-    save_roots_to_disk()
+    async with state_lock():
+        record_derivation(root_data, word, scheme_id, scheme.pattern)
     
     return {
         "word": word,
@@ -1184,7 +1616,7 @@ def generate(root: str, scheme_id: str):
     }
 
 @app.post("/api/validate")
-def validate(word: str, root_str: str):
+async def validate(word: str, root_str: str):
     """Validate if a word can be derived from a root using any scheme."""
     norm_input = normalize_arabic(word)
     
@@ -1193,34 +1625,15 @@ def validate(word: str, root_str: str):
     if not root_data:
         raise HTTPException(404, "Root not found")
     
-    schemes = scheme_table.get_all()
     verb_type = root_data.verb_type or ""
-    
-    found_scheme = None
-    found_pattern = None
-    for s in schemes:
-        generated = apply_pattern(root_str, s.pattern, verb_type)
-        generated = apply_verb_transformations(generated, root_str, verb_type, s.pattern, s.id)
-        generated = _apply_irregular_rules(generated, root_str, verb_type, s.id)
-        generated = generated.replace("=", "").strip()
-        if normalize_arabic(generated) == norm_input:
-            found_scheme = s.id
-            found_pattern = s.pattern
-            break
-            
+    found_scheme, found_pattern = validation_index(root_str, verb_type, _scheme_version).get(
+        norm_input, (None, None)
+    )
+
     if found_scheme:
         # Record in history
-        existing = next(
-            (d for d in root_data.derived_words if d.word == word and d.scheme_id == found_scheme),
-            None
-        )
-        if existing:
-            existing.frequency += 1
-        else:
-            root_data.derived_words.append(
-                DerivedWord(word=word, scheme_id=found_scheme, pattern=found_pattern)
-            )
-        save_roots_to_disk()
+        async with state_lock():
+            record_derivation(root_data, word, found_scheme, found_pattern)
         return {
             "isValid": True,
             "scheme": found_scheme,
@@ -1233,6 +1646,26 @@ def validate(word: str, root_str: str):
     }
 
 
+@app.post("/api/validate_batch")
+async def validate_batch(root_str: str, words: List[str]):
+    """Validate many words against one root (read-only: history is not updated)."""
+    root_data = root_tree.search(root_str)
+    if not root_data:
+        raise HTTPException(404, "Root not found")
+
+    index = validation_index(root_str, root_data.verb_type or "", _scheme_version)
+    results = []
+    for w in words:
+        found_scheme = index.get(normalize_arabic(w), (None, None))[0]
+        results.append({
+            "word": w,
+            "isValid": found_scheme is not None,
+            "scheme": found_scheme
+        })
+    return results
+
+
 if __name__ == "__main__":
     import uvicorn
+    # Single process (see README); uvicorn picks uvloop/httptools when installed
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,10 +5,29 @@ Based on the comprehensive Arabic morphology guide.
 """
 
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import json
 
 BASE_URL = "http://localhost:8000"
+MAX_WORKERS = 8
+# requests.Session is not guaranteed thread-safe: one kept-alive session per worker
+_thread_local = threading.local()
+
+def get_session() -> requests.Session:
+    """Return the calling thread's session, creating it on first use."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+def post_generate(root: str, scheme_id: str) -> requests.Response:
+    """Call /api/generate through the calling thread's session."""
+    return get_session().post(
+        f"{BASE_URL}/api/generate",
+        params={"root": root, "scheme_id": scheme_id}
+    )
 
 # Test cases: (root, verb_type, [(scheme_id, expected_output_pattern)])
 TEST_CASES = [
@@ -130,15 +149,15 @@ TEST_CASES = [
     },
 ]
 
+# Remove harakat (U+064B-U+0652) and standardize alefs / final ya in one pass
+_COMPARISON_TABLE = str.maketrans({
+    **{chr(c): None for c in range(0x064B, 0x0653)},
+    'آ': 'ا', 'أ': 'ا', 'إ': 'ا', 'ى': 'ي',
+})
+
 def normalize_for_comparison(text: str) -> str:
     """Normalize text for comparison (remove diacritics, standardize alefs)."""
-    import re
-    text = re.sub(r'[\u064B-\u0652]', '', text)  # Remove harakat
-    text = text.replace('آ', 'ا')
-    text = text.replace('أ', 'ا')
-    text = text.replace('إ', 'ا')
-    text = text.replace('ى', 'ي')
-    return text.strip()
+    return text.translate(_COMPARISON_TABLE).strip()
 
 def test_generation():
     """Test word generation for all verb types."""
@@ -149,6 +168,14 @@ def test_generation():
     passed = 0
     failed = 0
     
+    # Send all requests up front; results are read back in test order below
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    futures = {}
+    for test_group in TEST_CASES:
+        root = test_group["root"]
+        for scheme_id, _ in test_group["tests"]:
+            futures[(root, scheme_id)] = executor.submit(post_generate, root, scheme_id)
+    
     for test_group in TEST_CASES:
         root = test_group["root"]
         verb_type = test_group["verb_type"]
@@ -158,11 +185,8 @@ def test_generation():
         
         for scheme_id, expected_pattern in test_group["tests"]:
             try:
-                # Call API to generate
-                response = requests.post(
-                    f"{BASE_URL}/api/generate",
-                    params={"root": root, "scheme_id": scheme_id}
-                )
+                # Wait for the API response
+                response = futures[(root, scheme_id)].result()
                 
                 if response.status_code != 200:
                     print(f"  ❌ {scheme_id:10} | API Error: {response.status_code}")
@@ -188,6 +212,8 @@ def test_generation():
                 print(f"  ❌ {scheme_id:10} | Exception: {str(e)}")
                 failed += 1
     
+    executor.shutdown()
+    
     print("\n" + "="*80)
     print(f"📊 RESULTS: {passed} passed, {failed} failed out of {passed + failed}")
     print("="*80)